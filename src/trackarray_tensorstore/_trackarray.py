@@ -1,3 +1,4 @@
+from collections import deque
 from typing import Optional
 from typing import Sequence
 from typing import Dict, List
@@ -6,42 +7,98 @@ import numpy as np
 import pandas as pd
 import tensorstore as ts
 from numpy import typing as npt
-from skimage.measure import regionprops_table
+from scipy.ndimage import find_objects
+
+_READ_AHEAD_BATCHES = 2
+
+
+def _frame_chunk_size(grid: ts.ChunkLayout.Grid) -> int:
+    # The chunk size along the frame axis, or 1 if the layout leaves it
+    # unconstrained (the shape or its first element is then None)
+    shape = grid.shape
+    return (shape[0] if shape is not None else None) or 1
+
+
+def _iter_frames(label):
+    if not isinstance(label, ts.TensorStore):
+        # Convert one frame at a time, so that lazy arrays (zarr, dask)
+        # are not loaded as a whole
+        for frame in range(label.shape[0]):
+            yield np.asarray(label[frame])
+        return
+    # Read in batches of the read chunk along the frame axis, keeping the next
+    # few batches in flight so that TensorStore fetches them concurrently
+    # without holding the whole stack in memory
+    batch_size = _frame_chunk_size(label.chunk_layout.read_chunk)
+    n_frames = label.shape[0]
+    pending = deque()
+    for start in range(0, n_frames, batch_size):
+        pending.append(label[start : min(start + batch_size, n_frames)].read())
+        if len(pending) > _READ_AHEAD_BATCHES:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _frame_bboxes(frame_label: np.ndarray):
+    # Returns the labels and the (min_y, min_x, max_y, max_x) bboxes in a frame
+    label_values = None
+    if frame_label.size > 0 and frame_label.max() > frame_label.size:
+        # find_objects allocates one slot per label value,
+        # so relabel sparse label ids to consecutive ones first
+        label_values, inverse = np.unique(frame_label, return_inverse=True)
+        if label_values[0] != 0:
+            label_values = np.insert(label_values, 0, 0)
+            inverse += 1
+        frame_label = inverse.reshape(frame_label.shape)
+    # Collect the label and bbox of each found object in a single pass
+    found = np.array(
+        [
+            (i, sl[0].start, sl[1].start, sl[0].stop, sl[1].stop)
+            for i, sl in enumerate(find_objects(frame_label), start=1)
+            if sl is not None
+        ],
+        dtype=np.int64,
+    ).reshape(-1, 5)
+    labels, bboxes = found[:, 0], found[:, 1:]
+    if label_values is not None:
+        labels = label_values[labels].astype(np.int64)
+    return labels, bboxes
 
 
 def to_bbox_df(label: npt.ArrayLike) -> pd.DataFrame:
-    bbox_df = pd.concat(
-        [
-            pd.DataFrame(
-                regionprops_table(np.array(label[frame]), properties=("label", "bbox"))
-            ).assign(frame=frame)
-            for frame in range(label.shape[0])
-        ]
-    )
-    # bboxtuple
     # Bounding box (min_row, min_col, max_row, max_col).
     # Pixels belonging to the bounding box are in the half-open interval [min_row; max_row) and [min_col; max_col).
-    if bbox_df.empty:
-        return bbox_df
-    bbox_df["min_y"] = bbox_df["bbox-0"]
-    bbox_df["min_x"] = bbox_df["bbox-1"]
-    bbox_df["max_y"] = bbox_df["bbox-2"]
-    bbox_df["max_x"] = bbox_df["bbox-3"]
-    del bbox_df["bbox-0"], bbox_df["bbox-1"], bbox_df["bbox-2"], bbox_df["bbox-3"]
-    return bbox_df
-
-
-def _bbox_df_to_dict(bboxes_df):
-    return {
-        label: grp.set_index("frame").sort_index()
-        for label, grp in bboxes_df.groupby("label")
-    }
+    rows = []
+    for frame, frame_label in enumerate(_iter_frames(label)):
+        labels, bboxes = _frame_bboxes(frame_label)
+        rows.append(np.column_stack([labels, np.full(len(labels), frame), bboxes]))
+    return pd.DataFrame(
+        np.concatenate(rows, dtype=np.int64) if rows else np.empty((0, 6), np.int64),
+        columns=["label", "frame", "min_y", "min_x", "max_y", "max_x"],
+    )
 
 
-def _bbox_dict_to_df(bboxes_dict):
-    return pd.concat(
-        [grp.assign(label=label).reset_index() for label, grp in bboxes_dict.items()]
-    ).reset_index(drop=True)
+def _bbox_df_to_table(bboxes_df):
+    frames = bboxes_df["frame"].to_numpy(dtype=np.int64)
+    labels = bboxes_df["label"].to_numpy(dtype=np.int64)
+    bboxes = bboxes_df[["min_y", "min_x", "max_y", "max_x"]].to_numpy(dtype=np.int64)
+    key_to_row = {
+        key: row for row, key in enumerate(zip(frames.tolist(), labels.tolist()))
+    }
+    label_to_frames = {}
+    for frame, label in key_to_row:
+        label_to_frames.setdefault(label, set()).add(frame)
+    return np.ascontiguousarray(bboxes), key_to_row, label_to_frames
+
+
+def _bbox_table_to_df(bboxes, key_to_row):
+    keys = np.array(list(key_to_row.keys()), dtype=np.int64).reshape(-1, 2)
+    rows = np.fromiter(key_to_row.values(), dtype=np.int64, count=len(key_to_row))
+    return pd.DataFrame(
+        np.column_stack([keys[:, 1], keys[:, 0], bboxes[rows]]),
+        columns=["label", "frame", "min_y", "min_x", "max_y", "max_x"],
+    )
 
 
 class TrackArray:
@@ -66,20 +123,26 @@ class TrackArray:
         else:
             _attrs = {}
         _bbox_df = bboxes_df if bboxes_df is not None else _bbox_df
-        self._bboxes_dict = _bbox_df_to_dict(_bbox_df)
-        self._safe_label = max(self._bboxes_dict.keys()) + 1
+        # The bboxes are stored as rows of a (capacity, 4) array,
+        # indexed by (frame, label) through _key_to_row
+        self._bboxes, self._key_to_row, self._label_to_frames = _bbox_df_to_table(
+            _bbox_df
+        )
+        self._free_rows = []
+        self._safe_label = max(self._label_to_frames.keys(), default=0) + 1
         
         self.splits = splits if splits is not None else _splits
         self.termination_annotations = termination_annotations if termination_annotations is not None else _termination_annotations
         self.property_writer = property_writer
         self.attrs = attrs if attrs is not None else _attrs
 
+    @property
+    def bboxes_df(self):
+        return _bbox_table_to_df(self._bboxes, self._key_to_row)
+
     def is_valid(self):
         _bboxes_df1 = to_bbox_df(self.array)
-        _bboxes_df2 = _bbox_dict_to_df(self._bboxes_dict)
-        is_all_sorted = all(
-            [_df.index.is_monotonic_increasing for _df in self._bboxes_dict.values()]
-        )
+        _bboxes_df2 = self.bboxes_df
         return (
             _bboxes_df1.sort_values(["frame", "label"])
             .set_index(["frame", "label"])
@@ -88,13 +151,12 @@ class TrackArray:
                     ["frame", "label"]
                 )
             )
-            & is_all_sorted
         )
 
     def write_properties(self):
         if self.property_writer is not None:
             self.property_writer.write(
-                _bbox_dict_to_df(self._bboxes_dict), self.splits, self.termination_annotations, self.attrs
+                self.bboxes_df, self.splits, self.termination_annotations, self.attrs
             )
         else:
             raise ValueError("property_writer is not set, cannot write properties.")
@@ -102,24 +164,86 @@ class TrackArray:
     def _update_safe_label(self, new_label):
         self._safe_label = max(self._safe_label, new_label + 1)
 
-    def _get_track_bboxes(self, trackid: int):
-        return self._bboxes_dict.get(trackid, pd.DataFrame())
+    def _get_track_frames(self, trackid: int):
+        return self._label_to_frames.get(trackid, set())
 
     def _get_safe_track_id(self):
-        return self._safe_label
-
-    def _get_bboxes(self, frames: Sequence[int], trackid: int):
-        rows = self._bboxes_dict[trackid].loc[frames]
-        return rows[["min_y", "min_x", "max_y", "max_x"]]
+        # Reserve the id so that consecutive calls never return the same one
+        safe_label = self._safe_label
+        self._safe_label += 1
+        return safe_label
+
+    def _get_bbox(self, frame: int, trackid: int):
+        return self._bboxes[self._key_to_row[(frame, trackid)]]
+
+    def _allocate_row(self):
+        if not self._free_rows:
+            capacity = len(self._bboxes)
+            new_capacity = max(2 * capacity, 1)
+            self._bboxes = np.concatenate(
+                [self._bboxes, np.empty((new_capacity - capacity, 4), dtype=np.int64)]
+            )
+            self._free_rows.extend(range(new_capacity - 1, capacity - 1, -1))
+        return self._free_rows.pop()
+
+    def _set_bbox(self, frame: int, trackid: int, bbox):
+        row = self._key_to_row.get((frame, trackid))
+        if row is None:
+            row = self._allocate_row()
+            self._key_to_row[(frame, trackid)] = row
+        self._bboxes[row] = bbox
+        self._label_to_frames.setdefault(trackid, set()).add(frame)
+
+    def _remove_bbox(self, frame: int, trackid: int):
+        self._free_rows.append(self._key_to_row.pop((frame, trackid)))
+        self._remove_track_frame(frame, trackid)
+
+    def _remove_track_frame(self, frame: int, trackid: int):
+        frames = self._label_to_frames[trackid]
+        frames.discard(frame)
+        if not frames:
+            del self._label_to_frames[trackid]
 
     def __update_trackids_in_bboxes(self, frames, old_trackid, new_trackid):
-        previous_rows = self._bboxes_dict[old_trackid].loc[frames]
-        self._bboxes_dict[new_trackid] = pd.concat(
-            [self._get_track_bboxes(new_trackid), previous_rows]
-        ).sort_index()
-        self._bboxes_dict[old_trackid].drop(index=frames, inplace=True)
-        if self._bboxes_dict[old_trackid].empty:
-            self._bboxes_dict.pop(old_trackid)
+        # Only the keys change, the bbox rows stay in place
+        for frame in frames:
+            self._key_to_row[(frame, new_trackid)] = self._key_to_row.pop(
+                (frame, old_trackid)
+            )
+            self._label_to_frames.setdefault(new_trackid, set()).add(frame)
+            self._remove_track_frame(frame, old_trackid)
+
+    def _mask_scratch(self, frames: Sequence[int], trackid: int):
+        # A boolean buffer large enough for the mask of any of the bboxes,
+        # reused across frames instead of allocating one mask per frame
+        rows = [self._key_to_row[(frame, trackid)] for frame in frames]
+        bboxes = self._bboxes[rows]
+        areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+        return np.empty(int(areas.max()) if len(areas) > 0 else 0, dtype=bool)
+
+    def _replace_label(self, array_txn, frames, trackid, new_trackid, scratch=None):
+        # Returns the write futures without waiting, so that the writes for
+        # multiple frames can proceed concurrently
+        subarrs = []
+        for frame in frames:
+            min_y, min_x, max_y, max_x = self._get_bbox(frame, trackid)
+            subarrs.append(array_txn[frame, min_y:max_y, min_x:max_x])
+        # Inside a transaction the writes only update its in-memory state, so
+        # the actual I/O is the reads; issue all of them before waiting on any
+        read_futures = [subarr.read() for subarr in subarrs]
+        write_futures = []
+        for subarr, future in zip(subarrs, read_futures):
+            # Relabel a local copy of the bbox and write it back as a whole,
+            # instead of writing through the boolean index
+            values = future.result()
+            if scratch is None:
+                ind = values == trackid
+            else:
+                ind = scratch[: values.size].reshape(values.shape)
+                np.equal(values, trackid, out=ind)
+            np.putmask(values, ind, new_trackid)
+            write_futures.append(subarr.write(values))
+        return write_futures
 
     def _update_trackids(
         self,
@@ -128,35 +252,35 @@ class TrackArray:
         new_trackid: int,
         txn: ts.Transaction,
     ):
-        if not set(frames).isdisjoint(self._get_track_bboxes(new_trackid).index):
+        if not set(frames).isdisjoint(self._get_track_frames(new_trackid)):
             raise ValueError(
                 f"new_trackid {new_trackid} already exists in the bboxes at frame {frames}"
             )
 
         array_txn = self.array.with_transaction(txn)
-        rows = self._get_bboxes(frames, trackid)
-        min_ys, min_xs, max_ys, max_xs = rows[
-            ["min_y", "min_x", "max_y", "max_x"]
-        ].values.T
-        for frame, min_y, min_x, max_y, max_x in zip(
-            frames, min_ys, min_xs, max_ys, max_xs
-        ):
-            subarr = array_txn[frame, min_y:max_y, min_x:max_x]
-            ind = np.array(subarr) == trackid
-            subarr[ts.d[:].translate_to[0]][ind] = new_trackid
-            # Replace the trackid with the new_trackid
+        scratch = self._mask_scratch(frames, trackid)
+        # Replace the trackid with the new_trackid
+        write_futures = self._replace_label(
+            array_txn, frames, trackid, new_trackid, scratch
+        )
+        for future in write_futures:
+            future.result()
 
         self.__update_trackids_in_bboxes(frames, trackid, new_trackid)
         self._update_safe_label(new_trackid)
 
-    def _cleanup_track_as_daughter(self, trackid: int):
-        _splits = self.splits.copy()
-        for parent, daughters in _splits.items():
-            if int(trackid) in daughters:
-                self.splits[int(parent)] = [
-                    int(daughter) for daughter in daughters if daughter != trackid
-                ]
-        self.cleanup_single_daughter_splits()
+    def _cleanup_track_as_daughter(self, trackid: int, cleanup_splits: bool = True):
+        updated_splits = {
+            int(parent): [
+                int(daughter) for daughter in daughters if daughter != trackid
+            ]
+            for parent, daughters in self.splits.items()
+            if int(trackid) in daughters
+        }
+        self.splits.update(updated_splits)
+        # Callers that make several edits in a row can defer this to the end
+        if cleanup_splits:
+            self.cleanup_single_daughter_splits()
 
     def _cleanup_track_as_parent(self, trackid: int):
         self.termination_annotations.pop(trackid, None)
@@ -169,15 +293,12 @@ class TrackArray:
         txn: ts.Transaction,
         cleanup: bool = True,
     ):
-        row = self._get_bboxes([frame], trackid).iloc[0]
-        min_y, min_x, max_y, max_x = row[["min_y", "min_x", "max_y", "max_x"]]
         array_txn = self.array.with_transaction(txn)
-        subarr = array_txn[frame, min_y:max_y, min_x:max_x]
-        ind = np.array(subarr) == trackid
-        subarr[ts.d[:].translate_to[0]][ind] = 0
-        self._bboxes_dict[trackid].drop(index=(frame), inplace=True)
+        for future in self._replace_label(array_txn, [frame], trackid, 0):
+            future.result()
+        self._remove_bbox(frame, trackid)
         if (
-            cleanup and self._get_track_bboxes(trackid).empty
+            cleanup and trackid not in self._label_to_frames
         ):  # if the track becomes empty
             self._cleanup_track_as_daughter(trackid)
             self._cleanup_track_as_parent(trackid)
@@ -189,84 +310,85 @@ class TrackArray:
         mask_origin: Sequence[int],
         mask,
         txn: ts.Transaction,
+        cleanup_splits: bool = True,
     ):
+        """Add the mask of a track at a frame.
+
+        Args:
+            frame: The frame to add the mask to.
+            trackid: The track id to write.
+            mask_origin: The (y, x) position of the mask in the frame.
+            mask: A bool array, or a uint8 array whose nonzero pixels are
+                the mask. A 0/1 uint8 mask is used as bool without copying.
+            txn: The transaction to write in.
+            cleanup_splits: Whether to clean up the splits left with a single
+                daughter by the edit.
+        """
         assert mask.shape[0] + mask_origin[0] <= self.array.shape[1]
         assert mask.shape[1] + mask_origin[1] <= self.array.shape[2]
+        if mask.dtype == np.uint8:
+            # Only 0 and 1 are valid bool bytes, so e.g. 0/255 masks are compared
+            mask = mask.view(bool) if mask.max() <= 1 else mask != 0
         assert mask.dtype == bool
 
-        previous_frames = self._get_track_bboxes(trackid).index
+        previous_frames = self._get_track_frames(trackid)
+        if len(previous_frames) > 0:
+            min_frame = min(previous_frames)
+            max_frame = max(previous_frames)
 
         array_txn = self.array.with_transaction(txn)
-        inds = np.where(mask)
-        mask_min_y, mask_min_x = np.min(inds, axis=1)
-        mask_max_y, mask_max_x = np.max(inds, axis=1)
+        ys = np.flatnonzero(mask.any(axis=1))
+        xs = np.flatnonzero(mask.any(axis=0))
+        mask_min_y, mask_max_y = ys[0], ys[-1]
+        mask_min_x, mask_max_x = xs[0], xs[-1]
         y_window = (mask_origin[0] + mask_min_y, mask_origin[0] + mask_max_y + 1)
         x_window = (mask_origin[1] + mask_min_x, mask_origin[1] + mask_max_x + 1)
         mask2 = mask[mask_min_y : mask_max_y + 1, mask_min_x : mask_max_x + 1]
-        possibly_updated_labels = np.unique(
-            array_txn[frame, y_window[0] : y_window[1], x_window[0] : x_window[1]][
-                ts.d[:].translate_to[0]
-            ][mask2]
+        subarr = array_txn[frame, y_window[0] : y_window[1], x_window[0] : x_window[1]]
+        values = subarr.read().result()
+        possibly_updated_labels = set(np.unique(values[mask2])) - {0, trackid}
+        values[mask2] = trackid
+        subarr.write(values).result()
+
+        # Add entry to the bboxes
+        self._set_bbox(
+            frame, trackid, (y_window[0], x_window[0], y_window[1], x_window[1])
         )
-        possibly_updated_labels = set(possibly_updated_labels) - {0, trackid}
-        array_txn[frame, y_window[0] : y_window[1], x_window[0] : x_window[1]][
-            ts.d[:].translate_to[0]
-        ][mask2] = trackid
-
-        # Add entry to the bboxes_df
-        self._bboxes_dict[trackid] = pd.concat(
-            [
-                self._bboxes_dict.get(trackid, pd.DataFrame()),
-                pd.DataFrame(
-                    {
-                        "min_y": y_window[0],
-                        "min_x": x_window[0],
-                        "max_y": y_window[1],
-                        "max_x": x_window[1],
-                    },
-                    index=pd.Index([frame], name="frame"),
-                ),
-            ]
-        ).sort_index()
 
-        # Update the bboxes_df for the possibly updated labels by overlapping with the new mask
+        # Update the bboxes for the possibly updated labels by overlapping with the new mask
+        removed_daughters = False
         for updated_label in possibly_updated_labels:
-            min_y, min_x, max_y, max_x = self._get_bboxes([frame], updated_label).iloc[
-                0
-            ][["min_y", "min_x", "max_y", "max_x"]]
+            min_y, min_x, max_y, max_x = self._get_bbox(frame, updated_label)
             sublabel = array_txn[frame, min_y:max_y, min_x:max_x]
-            ind = np.nonzero(np.array(sublabel) == updated_label)
-            if np.any(ind):
-                self._bboxes_dict[updated_label].loc[frame, "min_y"] = min_y + np.min(
-                    ind[0]
-                )
-                self._bboxes_dict[updated_label].loc[frame, "min_x"] = min_x + np.min(
-                    ind[1]
-                )
-                self._bboxes_dict[updated_label].loc[frame, "max_y"] = (
-                    min_y + np.max(ind[0]) + 1
-                )
-                self._bboxes_dict[updated_label].loc[frame, "max_x"] = (
-                    min_x + np.max(ind[1]) + 1
+            ind = np.nonzero(sublabel.read().result() == updated_label)
+            if ind[0].size > 0:
+                bbox = (
+                    min_y + np.min(ind[0]),
+                    min_x + np.min(ind[1]),
+                    min_y + np.max(ind[0]) + 1,
+                    min_x + np.max(ind[1]) + 1,
                 )
+                self._set_bbox(frame, updated_label, bbox)
             else:
-                self._bboxes_dict[updated_label].drop(index=frame, inplace=True)
-            if self._get_track_bboxes(updated_label).empty:
+                self._remove_bbox(frame, updated_label)
+            if updated_label not in self._label_to_frames:
                 self._cleanup_track_as_parent(updated_label)
-                self._cleanup_track_as_daughter(updated_label)
+                self._cleanup_track_as_daughter(updated_label, cleanup_splits=False)
+                removed_daughters = True
 
         # Update splits and termination_annotations
         # invalidate splits and termination_annotations if the frame is later than the last frame of the original track
         if len(previous_frames) > 0:
-            min_frame = previous_frames.values[0]
-            max_frame = previous_frames.values[-1]
-
             if frame > max_frame:
                 self._cleanup_track_as_parent(trackid)
             # invalidate splits if the frame is earlier than the first frame of the original track
             if frame < min_frame:
-                self._cleanup_track_as_daughter(trackid)
+                self._cleanup_track_as_daughter(trackid, cleanup_splits=False)
+                removed_daughters = True
         self._update_safe_label(trackid)
+        # Merge the single-daughter splits once after all the removals
+        if removed_daughters and cleanup_splits:
+            self.cleanup_single_daughter_splits()
 
     def update_mask(
         self,
@@ -282,10 +404,17 @@ class TrackArray:
     def terminate_track(
         self, frame: int, trackid: int, annotation: str, txn: ts.Transaction
     ):
-        bboxes_df = self._get_track_bboxes(trackid)
-        bboxes_df = bboxes_df[bboxes_df.index > frame]
-        for frame in bboxes_df.index:
-            self.delete_mask(frame, trackid, txn)
+        frames = sorted(f for f in self._get_track_frames(trackid) if f > frame)
+        array_txn = self.array.with_transaction(txn)
+        scratch = self._mask_scratch(frames, trackid)
+        write_futures = self._replace_label(array_txn, frames, trackid, 0, scratch)
+        for future in write_futures:
+            future.result()
+        for frame in frames:
+            self._remove_bbox(frame, trackid)
+        if trackid not in self._label_to_frames:  # if the track becomes empty
+            self._cleanup_track_as_daughter(trackid)
+            self._cleanup_track_as_parent(trackid)
         self.termination_annotations[trackid] = annotation
         self.splits.pop(int(trackid), None)
 
@@ -296,31 +425,30 @@ class TrackArray:
         change_after: bool,
         txn: ts.Transaction,
         new_trackid: Optional[int] = None,
+        cleanup_splits: bool = True,
     ):
         if new_trackid is None:
             new_trackid = self._get_safe_track_id()
-        bboxes_df = self._get_track_bboxes(trackid)
+        frames = sorted(self._get_track_frames(trackid))
         if change_after:
-            change_bboxes_df = bboxes_df.loc[new_start_frame:]
+            change_frames = [f for f in frames if f >= new_start_frame]
         else:
-            change_bboxes_df = bboxes_df.loc[: new_start_frame - 1]
+            change_frames = [f for f in frames if f < new_start_frame]
 
-        if not set(change_bboxes_df.index).isdisjoint(
-            self._get_track_bboxes(new_trackid).index
-        ):
+        if not set(change_frames).isdisjoint(self._get_track_frames(new_trackid)):
             raise ValueError("new_trackid already exists in the bboxes_df")
 
-        frame_min = bboxes_df.index.values[0]
-        frame_max = bboxes_df.index.values[-1]
+        frame_min = frames[0]
+        frame_max = frames[-1]
         # Add the "break point" to the splits
         if frame_min == new_start_frame:
             # Delete the splits for which this track is a daughter
-            self._cleanup_track_as_daughter(trackid)
+            self._cleanup_track_as_daughter(trackid, cleanup_splits=cleanup_splits)
         if frame_max + 1 == new_start_frame:
             # Delete the splits for which this track is a parent
             self._cleanup_track_as_parent(trackid)
 
-        self._update_trackids(change_bboxes_df.index, trackid, new_trackid, txn)
+        self._update_trackids(change_frames, trackid, new_trackid, txn)
 
         if change_after:
             # Update splits
@@ -336,12 +464,12 @@ class TrackArray:
                 ] = self.termination_annotations.pop(int(trackid))
         else:
             # Update splits
-            _splits = self.splits.copy()
-            for parent, daughters in _splits.items():
-                if trackid in daughters:
-                    daughters.remove(int(trackid))
-                    daughters.append(int(new_trackid))
-                    self.splits[int(parent)] = daughters
+            renamed_splits = {
+                parent: [d for d in daughters if d != trackid] + [int(new_trackid)]
+                for parent, daughters in self.splits.items()
+                if trackid in daughters
+            }
+            self.splits.update(renamed_splits)
 
         return new_trackid
 
@@ -353,23 +481,33 @@ class TrackArray:
         txn: ts.Transaction,
     ):
         new_trackid = self.break_track(
-            daughter_start_frame, parent_trackid, change_after=True, txn=txn
+            daughter_start_frame,
+            parent_trackid,
+            change_after=True,
+            txn=txn,
+            cleanup_splits=False,
         )
         daughter_trackids = [
             int(i) if i != parent_trackid else new_trackid for i in daughter_trackids
         ]
         for daughter_trackid in daughter_trackids:
             self.break_track(
-                daughter_start_frame, daughter_trackid, change_after=False, txn=txn
+                daughter_start_frame,
+                daughter_trackid,
+                change_after=False,
+                txn=txn,
+                cleanup_splits=False,
             )
         self.splits[int(parent_trackid)] = daughter_trackids
         self.cleanup_single_daughter_splits()
 
     def cleanup_single_daughter_splits(self):
-        _splits = self.splits.copy()
-        for parent, daughters in _splits.items():
-            if len(daughters) == 1:
-                daughter = int(daughters[0])
-                track_df = self._get_track_bboxes(daughter)
-                self._update_trackids(track_df.index, daughter, parent, None)
-                self.splits.pop(int(parent))
+        single_daughter_splits = [
+            (parent, int(daughters[0]))
+            for parent, daughters in self.splits.items()
+            if len(daughters) == 1
+        ]
+        for parent, daughter in single_daughter_splits:
+            frames = sorted(self._get_track_frames(daughter))
+            self._update_trackids(frames, daughter, parent, None)
+            self.splits.pop(int(parent))
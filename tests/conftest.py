@@ -72,3 +72,18 @@ def trackarr_from_name(labels_dir, trackarr):
         return trackarr(labels, split_dict), labels, split_dict
 
     return _trackarr_from_name
+
+
+@pytest.fixture
+def time_chunked_trackarr(labels_dir, tmp_path):
+    def _time_chunked_trackarr():
+        labels = np.load(labels_dir / "original_labels.npy")
+        write_spec = get_write_spec(tmp_path / "test.zarr", labels.shape)
+        metadata = write_spec["metadata"]
+        metadata["chunk_grid"]["configuration"]["chunk_shape"][0] = 4
+        metadata["codecs"][0]["configuration"]["chunk_shape"][0] = 4
+        arr = ts.open(write_spec).result()
+        arr.write(labels).result()
+        return tta.TrackArray(arr, {}, {}, tta.to_bbox_df(labels))
+
+    return _time_chunked_trackarr
@@ -8,7 +8,7 @@ from ._utils import compare_nested_structures
 
 def _test_write_read_same(cls, trackarr_from_name, tmp_path, **kwargs):
     ta, labels, splits = trackarr_from_name("original")
-    bbox_df = tta._trackarray._bbox_dict_to_df(ta._bboxes_dict)
+    bbox_df = ta.bboxes_df
     termination_annotations = {int(i):f"test_{i}" for i in np.unique(labels)}
     attrs = {"test": "test"}
     readwrite = cls(tmp_path/"test", tmp_path/"test", **kwargs)
@@ -34,7 +34,7 @@ def test_write_read_same(cls, trackarr_from_name, tmp_path):
     
 def test_direct_read_fn(trackarr_from_name, tmp_path):
     ta, labels, splits = trackarr_from_name("original")
-    bbox_df = tta._trackarray._bbox_dict_to_df(ta._bboxes_dict)
+    bbox_df = ta.bboxes_df
     termination_annotations = {int(i):f"test_{i}" for i in np.unique(labels)}
 
     bbox_df.to_csv(tmp_path/"testarr.csv")
@@ -23,16 +23,25 @@ def test_to_bbox_df(labels_dir):
             assert row["min_y"] == ind[0].min()
             assert row["max_y"] == ind[0].max() + 1
 
+def test_to_bbox_df_sparse_labels(labels_dir):
+    labels = np.load(labels_dir / "original_labels.npy").astype(np.uint32)
+    sparse_labels = np.where(labels > 0, labels + 10_000_000, 0)
+    bbox_df = tta.to_bbox_df(labels)
+    sparse_bbox_df = tta.to_bbox_df(sparse_labels)
+    sparse_bbox_df["label"] -= 10_000_000
+    assert bbox_df.equals(sparse_bbox_df)
+
 def test_df_conversion(labels_dir):
     labels = np.load(labels_dir / "original_labels.npy")
     bbox_df = tta.to_bbox_df(labels)
     bbox_df2 = bbox_df.copy().sort_values(["frame","label"]).reset_index(drop=True)
-    # make sure the columns starts by frame and label
-    bbox_df2 = bbox_df2[["frame","label"]+list(bbox_df2.columns[2:])]
-    test_dict = tta._trackarray._bbox_df_to_dict(bbox_df)
-    bbox_df3 = tta._trackarray._bbox_dict_to_df(test_dict)
+    bboxes, key_to_row, label_to_frames = tta._trackarray._bbox_df_to_table(bbox_df)
+    assert label_to_frames == {
+        label: set(grp["frame"]) for label, grp in bbox_df.groupby("label")
+    }
+    bbox_df3 = tta._trackarray._bbox_table_to_df(bboxes, key_to_row)
     bbox_df3 = bbox_df3.sort_values(["frame","label"]).reset_index(drop=True)
-    bbox_df3 = bbox_df3[["frame","label"]+list(bbox_df3.columns[2:])]
+    bbox_df3 = bbox_df3[list(bbox_df2.columns)]
     assert bbox_df2.equals(bbox_df3)
     
 
@@ -51,18 +60,28 @@ def test_validate(trackarr_from_name, all_label_filenames):
     for filename in all_label_filenames:
         ta, _, _ = trackarr_from_name(filename)
         assert ta.is_valid()
-        ta._bboxes_dict[1].loc[0, "min_y"] = 0
+        ta._bboxes[ta._key_to_row[(0, 1)], 0] = 0
         assert not ta.is_valid()
 
 
+def test_get_safe_track_id(trackarr):
+    labels = np.zeros((2, 20, 20), dtype=np.uint32)
+    ta = trackarr(labels, {})
+    assert ta._get_safe_track_id() == 1
+    assert ta._get_safe_track_id() == 2
+    with ts.Transaction() as txn:
+        ta.add_mask(0, 10, (0, 0), np.ones((2, 2), dtype=bool), txn)
+    assert ta._get_safe_track_id() == 11
+
+
 def test_delete_mask(trackarr_from_name):
     ta, labels, _ = trackarr_from_name("original")
     unique_labels = np.unique(labels)
     unique_labels = unique_labels[unique_labels != 0]
     map_dict = {l: l for l in unique_labels}
 
-    for label, grp in ta._bboxes_dict.items():
-        for frame in grp.index:
+    for label, frames in ta._label_to_frames.items():
+        for frame in frames:
             ta, labels, split_dict = trackarr_from_name("original")
             termination_annotations = deepcopy(ta.termination_annotations)
 
@@ -101,6 +120,64 @@ def test_add_mask(trackarr_from_name):
         assert ta.is_valid()
 
 
+def test_add_mask_bbox_table_growth(trackarr_from_name):
+    ta, labels, _ = trackarr_from_name("original")
+    new_label = int(np.max(labels)) + 1
+    n_rows = len(ta._key_to_row)
+    with ts.Transaction() as txn:
+        for i in range(n_rows + 1):
+            # non-overlapping 2x2 masks, each with its own label
+            k = i // len(labels)
+            origin = (2 * (k // 100), 2 * (k % 100))
+            mask = np.ones((2, 2), dtype=bool)
+            ta.add_mask(i % len(labels), new_label + i, origin, mask, txn)
+    # the capacity grows geometrically rather than by one row per mask
+    capacity = len(ta._bboxes)
+    assert len(ta._key_to_row) <= capacity < 4 * len(ta._key_to_row)
+    assert ta.is_valid()
+
+    # rows freed by deletions are reused
+    row = ta._key_to_row[(0, new_label)]
+    with ts.Transaction() as txn:
+        ta.delete_mask(0, new_label, txn)
+        ta.add_mask(0, new_label, (0, 0), np.ones((2, 2), dtype=bool), txn)
+    assert ta._key_to_row[(0, new_label)] == row
+    assert len(ta._bboxes) == capacity
+    assert ta.is_valid()
+
+
+def test_add_mask_uint8(trackarr_from_name):
+    ta, labels, _ = trackarr_from_name("original")
+    new_label = np.max(labels) + 1
+    mask = np.zeros((100, 100), dtype=np.uint8)
+    mask[20:80, 30:70] = 1
+    with ts.Transaction() as txn:
+        ta.add_mask(0, new_label, (10, 10), mask, txn)
+    assert np.all(np.array(ta.array)[0, 30:90, 40:80] == new_label)
+    assert ta.is_valid()
+
+    # 0/255 masks are not valid bool bytes and are compared instead
+    ta, labels, _ = trackarr_from_name("original")
+    with ts.Transaction() as txn:
+        ta.add_mask(0, new_label, (10, 10), mask * 255, txn)
+    expected = labels[0].copy()
+    expected[30:90, 40:80] = new_label
+    assert np.all(np.array(ta.array)[0] == expected)
+    assert ta.is_valid()
+
+
+def test_add_mask_shrinks_overlapped_bbox(trackarr):
+    labels = np.zeros((2, 20, 20), dtype=np.uint32)
+    labels[0, 5, 5] = 1
+    labels[0, 8, 8] = 1
+    labels[1, 5, 5] = 2
+    ta = trackarr(labels, {})
+    with ts.Transaction() as txn:
+        ta.add_mask(0, 3, (8, 8), np.ones((1, 1), dtype=bool), txn)
+    assert ta.is_valid()
+    assert tuple(ta._get_bbox(0, 1)) == (5, 5, 6, 6)
+
+
 def test_update_mask(trackarr_from_name):
     ta, labels, _ = trackarr_from_name("original")
     assert 1 in labels[0].ravel()
@@ -198,3 +275,37 @@ def test_break_track(trackarr_from_name, test_name):
     assert ta.is_valid()
     assert np.all(np.array(ta.array) == labels2)
     assert compare_nested_structures(ta.splits, ta2.splits)
+
+
+def test_to_bbox_df_time_chunked(labels_dir, time_chunked_trackarr):
+    ta = time_chunked_trackarr()
+    # the frame count is not a multiple of the read chunk
+    assert ta.array.chunk_layout.read_chunk.shape[0] == 4
+    assert ta.array.shape[0] % 4 != 0
+    labels = np.load(labels_dir / "original_labels.npy")
+    assert tta.to_bbox_df(ta.array).equals(tta.to_bbox_df(labels))
+    assert ta.is_valid()
+
+
+def test_to_bbox_df_unconstrained_chunks(labels_dir):
+    labels = np.load(labels_dir / "original_labels.npy")
+    arr = ts.array(labels)
+    # in-memory arrays leave the chunk layout unconstrained
+    assert arr.chunk_layout.read_chunk.shape[0] is None
+    assert tta.to_bbox_df(arr).equals(tta.to_bbox_df(labels))
+
+def test_edit_time_chunked_array(labels_dir, time_chunked_trackarr):
+    ta = time_chunked_trackarr()
+    assert ta.array.chunk_layout.write_chunk.shape[0] == 4
+    expected = np.load(labels_dir / "frame3_8break_change_after_to_20_labels.npy")
+    with ts.Transaction() as txn:
+        ta.break_track(3, 8, True, txn, new_trackid=20)
+    assert ta.is_valid()
+    assert np.all(np.array(ta.array) == expected)
+
+    ta = time_chunked_trackarr()
+    expected = np.load(labels_dir / "frame2_8terminate_labels.npy")
+    with ts.Transaction() as txn:
+        ta.terminate_track(2, 8, "test_annotation", txn)
+    assert ta.is_valid()
+    assert np.all(np.array(ta.array) == expected)